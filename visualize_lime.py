@@ -1,7 +1,43 @@
-import json
+"""Regenerate LIME visualizations from an existing incident_log.json.
+
+incident_logger.py already writes these HTML files during its single
+explanation pass; this script only needs to be run to rebuild them
+afterwards (it reuses the model persisted by incident_logger.py).
+"""
+
 import os
-from incident_logger import train_text_classifier
-from lime.lime_text import LimeTextExplainer
+
+import joblib
+import orjson
+from joblib import Parallel, delayed
+
+from incident_logger import MODEL_FILE, _explainer, explain_with_lime
+
+
+def _render_one(inc, vectorizer, clf, class_names, out_dir):
+    # Worker function for joblib: explains one incident and writes its HTML.
+    # Module-level so it pickles cleanly into loky worker processes.
+    explainer = _explainer(tuple(class_names))
+    text = inc.get("description", "")
+    _, _, exp = explain_with_lime(vectorizer, clf, class_names, text, explainer, num_features=6)
+    html = exp.as_html()
+
+    fname = f"incident_{inc['id']}.html"
+    path = os.path.join(out_dir, fname)
+
+    # Save the LIME HTML output for the incident
+    with open(path, "w", encoding="utf-8") as fh:
+        # Write a small header then the LIME HTML (LIME returns a full HTML document)
+        fh.write(f"<!-- Incident: {inc['id']} -->\n")
+        fh.write(f"<h2>Incident {inc['id']}</h2>\n")
+        fh.write(f"<p><strong>Location:</strong> {inc.get('location','')}<br>")
+        fh.write(f"<strong>Time:</strong> {inc.get('timestamp','')}<br>")
+        fh.write(f"<strong>Predicted severity:</strong> {inc.get('predicted_severity','')}<br></p>\n")
+        fh.write(html)
+
+    return (
+        f"<li><a href=\"{fname}\">{inc.get('timestamp','')} — {inc.get('location','')} — {inc.get('predicted_severity','')}</a></li>"
+    )
 
 
 def main():
@@ -9,23 +45,14 @@ def main():
     out_dir = "visualizations"
     os.makedirs(out_dir, exist_ok=True)
 
-    with open(in_file, "r", encoding="utf-8") as fh:
-        incidents = json.load(fh)
-
-    # Build a small training set from the incident descriptions
-    train_events = []
-    for inc in incidents:
-        ev = {
-            "description": inc.get("description", ""),
-            "injured": inc.get("injured", False),
-            "witness_count": inc.get("witness_count", 0),
-        }
-        # duplicate to give the classifier more examples
-        for _ in range(4):
-            train_events.append(ev.copy())
+    with open(in_file, "rb") as fh:
+        incidents = orjson.loads(fh.read())
 
-    pipeline, class_names = train_text_classifier(train_events)
-    explainer = LimeTextExplainer(class_names=class_names)
+    # Reuse the model trained by incident_logger.py rather than keeping a
+    # second training path here
+    if not os.path.exists(MODEL_FILE):
+        raise SystemExit(f"{MODEL_FILE} not found — run incident_logger.py first")
+    vectorizer, clf, class_names = joblib.load(MODEL_FILE)
 
     index_lines = [
         "<html>",
@@ -35,27 +62,13 @@ def main():
         "<ul>",
     ]
 
-    for inc in incidents:
-        text = inc.get("description", "")
-        exp = explainer.explain_instance(text, pipeline.predict_proba, num_features=6)
-        html = exp.as_html()
-
-        fname = f"incident_{inc['id']}.html"
-        path = os.path.join(out_dir, fname)
-
-        # Save the LIME HTML output for the incident
-        with open(path, "w", encoding="utf-8") as fh:
-            # Write a small header then the LIME HTML (LIME returns a full HTML document)
-            fh.write(f"<!-- Incident: {inc['id']} -->\n")
-            fh.write(f"<h2>Incident {inc['id']}</h2>\n")
-            fh.write(f"<p><strong>Location:</strong> {inc.get('location','')}<br>")
-            fh.write(f"<strong>Time:</strong> {inc.get('timestamp','')}<br>")
-            fh.write(f"<strong>Predicted severity:</strong> {inc.get('predicted_severity','')}<br></p>\n")
-            fh.write(html)
-
-        index_lines.append(
-            f"<li><a href=\"{fname}\">{inc.get('timestamp','')} — {inc.get('location','')} — {inc.get('predicted_severity','')}</a></li>"
+    # Explaining + rendering each incident is independent, so run them across
+    # all cores; workers write their HTML files directly.
+    index_lines.extend(
+        Parallel(n_jobs=-1, prefer="processes")(
+            delayed(_render_one)(inc, vectorizer, clf, class_names, out_dir) for inc in incidents
         )
+    )
 
     index_lines.extend(["</ul>", "</body>", "</html>"])
     with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as fh: